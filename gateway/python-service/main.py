@@ -4,14 +4,45 @@ AcreBlitz Gateway - Python Service
 FastAPI-based weather service using the National Weather Service API.
 """
 
+import logging
 import os
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from routers import health, weather
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", "production").lower()
 IS_DEV = ENVIRONMENT in ["development", "dev", "local"]
 
+# Log records are queued and written to stderr from a background thread,
+# so logging never blocks the event loop.
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    handlers=[QueueHandler(log_queue)],
+)
+logging.getLogger("routers").setLevel(logging.DEBUG if IS_DEV else logging.INFO)
+logging.getLogger("httpx").setLevel(logging.INFO if IS_DEV else logging.WARNING)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start logging and the shared NWS client; stop them on shutdown."""
+    log_listener.start()
+    app.state.http_client = weather.create_http_client()
+    try:
+        await weather.warm_up_http_client(app.state.http_client)
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        log_listener.stop()
+
+
 app = FastAPI(
     title="AcreBlitz Gateway - Python Service",
     description="Python/FastAPI endpoints for the unified API gateway",
@@ -19,6 +50,8 @@ app = FastAPI(
     docs_url="/docs" if IS_DEV else None,
     redoc_url="/redoc" if IS_DEV else None,
     openapi_url="/openapi.json" if IS_DEV else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -1,16 +1,24 @@
 """Health check endpoint."""
 
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
 from fastapi import APIRouter
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 
+@lru_cache(maxsize=1)
+def format_timestamp(second: int) -> str:
+    """Format a Unix time as ISO 8601 UTC; cached for the current second."""
+    return datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 @router.get("")
 async def health_check():
     """Return service health status."""
     return {
         "status": "healthy",
         "service": "python-service",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": format_timestamp(int(time.time())),
     }
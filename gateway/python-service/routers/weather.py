@@ -1,19 +1,297 @@
 """Weather endpoints using National Weather Service API."""
 
-import time
-from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, NamedTuple, Optional, TypeVar, Union
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+import hishel
 import httpx
+import msgspec
+import orjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/weather", tags=["weather"])
 
 WEATHER_API_BASE = "https://api.weather.gov"
 USER_AGENT = "AcreBlitz Gateway (https://acreblitz.com)"
 
-# Grid point cache
-grid_point_cache: dict[str, dict] = {}
+
+class GridPoint(NamedTuple):
+    """NWS grid point metadata for a location."""
+
+    grid_id: str
+    grid_x: int
+    grid_y: int
+    forecast_hourly: str
+    observation_stations: str
+    city: Optional[str]
+    state: Optional[str]
+
+
+# NWS response schemas. Only the fields used here are declared; msgspec
+# skips everything else while decoding. Fields that are only passed through
+# to the response are optional, so a null from NWS comes out as null
+# instead of failing the whole decode.
+class QuantitativeValue(msgspec.Struct):
+    value: Union[int, float, None] = None
+
+
+MISSING_VALUE = QuantitativeValue()
+
+
+class RelativeLocationProperties(msgspec.Struct):
+    city: Optional[str] = None
+    state: Optional[str] = None
+
+
+class RelativeLocation(msgspec.Struct):
+    properties: RelativeLocationProperties
+
+
+class PointProperties(msgspec.Struct, rename="camel"):
+    grid_id: str
+    grid_x: int
+    grid_y: int
+    forecast_hourly: str
+    observation_stations: str
+    relative_location: RelativeLocation
+
+
+class PointResponse(msgspec.Struct):
+    properties: PointProperties
+
+
+class Period(msgspec.Struct, rename="camel"):
+    start_time: Optional[str] = None
+    temperature: Union[int, float, None] = None
+    temperature_unit: Optional[str] = None
+    wind_speed: Optional[str] = None
+    wind_direction: Optional[str] = None
+    icon: Optional[str] = None
+    short_forecast: Optional[str] = None
+    is_daytime: Optional[bool] = None
+    probability_of_precipitation: Optional[QuantitativeValue] = None
+    relative_humidity: Optional[QuantitativeValue] = None
+
+
+class ForecastProperties(msgspec.Struct):
+    periods: list[Period]
+
+
+class ForecastResponse(msgspec.Struct):
+    properties: ForecastProperties
+
+
+class Station(msgspec.Struct):
+    id: str
+
+
+class StationCollection(msgspec.Struct):
+    features: list[Station]
+
+
+class ObservationProperties(msgspec.Struct, rename="camel"):
+    timestamp: Optional[str] = None
+    temperature: Optional[QuantitativeValue] = None
+    text_description: Optional[str] = None
+    icon: Optional[str] = None
+    relative_humidity: Optional[QuantitativeValue] = None
+    wind_speed: Optional[QuantitativeValue] = None
+    wind_direction: Optional[QuantitativeValue] = None
+    barometric_pressure: Optional[QuantitativeValue] = None
+
+
+class ObservationResponse(msgspec.Struct):
+    properties: ObservationProperties
+
+
+point_decoder = msgspec.json.Decoder(PointResponse)
+forecast_decoder = msgspec.json.Decoder(ForecastResponse)
+stations_decoder = msgspec.json.Decoder(StationCollection)
+observation_decoder = msgspec.json.Decoder(ObservationResponse)
+
+# Upstream protection: cap concurrent NWS requests and retry throttled or
+# failed ones with exponential backoff (honoring Retry-After when given)
+NWS_MAX_CONCURRENCY = 64
+NWS_MAX_ATTEMPTS = 3
+NWS_RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
+NWS_MAX_RETRY_DELAY = 5.0  # seconds
+NWS_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+nws_semaphore = asyncio.Semaphore(NWS_MAX_CONCURRENCY)
+
+# Browser caching for /weather/forecast responses
+FORECAST_CACHE_CONTROL = "public, max-age=60"
+
+# Capacity of the HTTP response cache honoring NWS Cache-Control/ETag
+HTTP_CACHE_CAPACITY = 1024
+
+# Startup connection warm-up; kept short so startup is not held up
+WARM_UP_TIMEOUT = 5.0  # seconds
+
+# Grid point cache (bounded; entries expire after GRID_CACHE_TTL)
 GRID_CACHE_TTL = 24 * 60 * 60  # 24 hours in seconds
+GRID_CACHE_MAX_SIZE = 10_000
+grid_point_cache: TTLCache[str, GridPoint] = TTLCache(
+    maxsize=GRID_CACHE_MAX_SIZE, ttl=GRID_CACHE_TTL
+)
+# Grid point lookups currently in flight, keyed like the cache
+grid_point_inflight: dict[str, asyncio.Task] = {}
+
+# Short-lived caches for hourly forecasts and current conditions, keyed by
+# NWS URL, so bursts of requests for one location share an upstream fetch
+WEATHER_CACHE_TTL = 60  # seconds
+WEATHER_CACHE_MAX_SIZE = 2048
+hourly_forecast_cache: TTLCache[str, list] = TTLCache(
+    maxsize=WEATHER_CACHE_MAX_SIZE, ttl=WEATHER_CACHE_TTL
+)
+hourly_forecast_inflight: dict[str, asyncio.Task] = {}
+# A location with no observation stations is cached as None; fetch errors
+# are not cached
+current_conditions_cache: TTLCache[str, Optional[dict]] = TTLCache(
+    maxsize=WEATHER_CACHE_MAX_SIZE, ttl=WEATHER_CACHE_TTL
+)
+CACHE_MISS = object()
+current_conditions_inflight: dict[str, asyncio.Task] = {}
+
+T = TypeVar("T")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create the shared NWS client, kept open for the life of the app.
+
+    Responses go through an HTTP cache that honors the Cache-Control and
+    ETag headers sent by NWS, so repeat fetches are served from memory or
+    revalidated with a conditional request instead of re-downloaded.
+    HTTP/2 lets concurrent requests share one connection, and responses
+    are requested compressed.
+    """
+    transport = hishel.AsyncCacheTransport(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=64,
+                keepalive_expiry=60.0,
+            ),
+        ),
+        storage=hishel.AsyncInMemoryStorage(capacity=HTTP_CACHE_CAPACITY),
+    )
+    return httpx.AsyncClient(
+        base_url=WEATHER_API_BASE,
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/geo+json",
+            "Accept-Encoding": "gzip, br",
+        },
+        timeout=10.0,
+        transport=transport,
+    )
+
+
+async def warm_up_http_client(client: httpx.AsyncClient) -> None:
+    """
+    Open a pooled connection to NWS before the first request.
+
+    Resolves DNS and completes the TLS handshake up front. Failures are
+    logged and ignored; requests will connect on demand instead.
+    """
+    try:
+        await client.head("/", timeout=WARM_UP_TIMEOUT)
+        logger.info("Warmed up connection to %s", WEATHER_API_BASE)
+    except Exception as e:
+        logger.warning("Could not warm up connection to %s: %s", WEATHER_API_BASE, e)
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Return the shared NWS client created at startup."""
+    return request.app.state.http_client
+
+
+async def single_flight(
+    inflight: dict[str, asyncio.Task],
+    key: str,
+    fetch: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Run fetch at most once per key at a time.
+
+    Concurrent callers for the same key await the same task. The task is
+    shielded so a cancelled caller does not cancel it for the others.
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        inflight[key] = task
+        task.add_done_callback(
+            lambda done: inflight.pop(key) if inflight.get(key) is done else None
+        )
+    return await asyncio.shield(task)
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying, from Retry-After or backoff."""
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        delay = float(retry_after)
+    else:
+        delay = NWS_RETRY_BACKOFF * 2 ** (attempt - 1)
+    return min(delay, NWS_MAX_RETRY_DELAY)
+
+
+async def fetch_json(
+    client: httpx.AsyncClient, url: str, decoder: msgspec.json.Decoder[T]
+) -> T:
+    """
+    GET an NWS resource and decode its body with a typed decoder.
+
+    Requests are limited to NWS_MAX_CONCURRENCY at a time, and 429/5xx
+    responses are retried up to NWS_MAX_ATTEMPTS times. The body is
+    handed to msgspec as raw bytes; the caching transport has already
+    read it in full, so streaming it here would not lower peak memory.
+    """
+    for attempt in range(1, NWS_MAX_ATTEMPTS + 1):
+        async with nws_semaphore:
+            response = await client.get(url)
+
+        if (
+            response.status_code not in NWS_RETRY_STATUS_CODES
+            or attempt == NWS_MAX_ATTEMPTS
+        ):
+            break
+
+        delay = retry_delay(response, attempt)
+        logger.warning(
+            "NWS returned %s for %s; retrying in %.1fs",
+            response.status_code,
+            response.url,
+            delay,
+        )
+        await asyncio.sleep(delay)
+
+    response.raise_for_status()
+    return decoder.decode(response.content)
+
+
+def forecast_etag(payload: dict) -> str:
+    """Build a strong ETag from the forecast payload."""
+    digest = hashlib.blake2b(orjson.dumps(payload), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
 
 
 def celsius_to_fahrenheit(celsius: Optional[float]) -> Optional[int]:
@@ -23,157 +301,204 @@ def celsius_to_fahrenheit(celsius: Optional[float]) -> Optional[int]:
     return round((celsius * 9) / 5 + 32)
 
 
-async def get_grid_point(lat: float, lon: float) -> dict:
-    """Get grid point information for coordinates."""
-    cache_key = f"{lat:.4f},{lon:.4f}"
+async def get_grid_point(
+    client: httpx.AsyncClient, lat: float, lon: float
+) -> GridPoint:
+    """
+    Get grid point information for coordinates.
+
+    Coordinates are quantized to 2 decimal places (about 1 km) before the
+    cache lookup and the NWS request. NWS grid cells are about 2.5 km, so
+    nearby points share one cache entry.
+    """
+    cache_key = f"{lat:.2f},{lon:.2f}"
     cached = grid_point_cache.get(cache_key)
 
-    if cached and time.time() - cached["timestamp"] < GRID_CACHE_TTL:
-        print(f"[Weather] Using cached grid point for: {cache_key}")
-        return cached["data"]
+    if cached is not None:
+        logger.debug("Using cached grid point for: %s", cache_key)
+        return cached
 
-    print(f"[Weather] Fetching grid point for: {cache_key}")
+    return await single_flight(
+        grid_point_inflight,
+        cache_key,
+        lambda: fetch_grid_point(client, cache_key),
+    )
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{WEATHER_API_BASE}/points/{lat},{lon}",
-            headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-            timeout=10.0,
-        )
-        response.raise_for_status()
-        props = response.json()["properties"]
-
-        data = {
-            "gridId": props["gridId"],
-            "gridX": props["gridX"],
-            "gridY": props["gridY"],
-            "forecastHourly": props["forecastHourly"],
-            "observationStations": props["observationStations"],
-            "city": props["relativeLocation"]["properties"]["city"],
-            "state": props["relativeLocation"]["properties"]["state"],
-        }
 
-        grid_point_cache[cache_key] = {"data": data, "timestamp": time.time()}
-        return data
+async def fetch_grid_point(client: httpx.AsyncClient, cache_key: str) -> GridPoint:
+    """Fetch grid point information from NWS and cache it."""
+    logger.debug("Fetching grid point for: %s", cache_key)
+
+    point = await fetch_json(client, f"/points/{cache_key}", point_decoder)
+    props = point.properties
+
+    location = props.relative_location.properties
+    grid_point = GridPoint(
+        grid_id=props.grid_id,
+        grid_x=props.grid_x,
+        grid_y=props.grid_y,
+        forecast_hourly=props.forecast_hourly,
+        observation_stations=props.observation_stations,
+        city=location.city,
+        state=location.state,
+    )
 
+    grid_point_cache[cache_key] = grid_point
+    return grid_point
 
-async def get_hourly_forecast(url: str) -> list:
+
+async def get_hourly_forecast(client: httpx.AsyncClient, url: str) -> list:
     """Get hourly forecast from NWS."""
-    print("[Weather] Fetching hourly forecast")
+    cached = hourly_forecast_cache.get(url)
+
+    if cached is not None:
+        logger.debug("Using cached hourly forecast for: %s", url)
+        return cached
+
+    return await single_flight(
+        hourly_forecast_inflight, url, lambda: fetch_hourly_forecast(client, url)
+    )
+
+
+async def fetch_hourly_forecast(client: httpx.AsyncClient, url: str) -> list:
+    """Fetch hourly forecast from NWS and cache it."""
+    logger.debug("Fetching hourly forecast")
+
+    periods = (await fetch_json(client, url, forecast_decoder)).properties.periods
+
+    forecast = [
+        {
+            "time": period.start_time,
+            "temperature": period.temperature,
+            "temperatureUnit": period.temperature_unit,
+            "precipitationChance": (
+                period.probability_of_precipitation or MISSING_VALUE
+            ).value,
+            "relativeHumidity": (period.relative_humidity or MISSING_VALUE).value,
+            "windSpeed": period.wind_speed,
+            "windDirection": period.wind_direction,
+            "icon": period.icon,
+            "shortForecast": period.short_forecast,
+            "isDaytime": period.is_daytime,
+        }
+        for period in periods
+    ]
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            url,
-            headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-            timeout=10.0,
-        )
-        response.raise_for_status()
-        periods = response.json()["properties"]["periods"]
-
-        return [
-            {
-                "time": period["startTime"],
-                "temperature": period["temperature"],
-                "temperatureUnit": period["temperatureUnit"],
-                "precipitationChance": period.get("probabilityOfPrecipitation", {}).get(
-                    "value"
-                ),
-                "relativeHumidity": period.get("relativeHumidity", {}).get("value"),
-                "windSpeed": period["windSpeed"],
-                "windDirection": period["windDirection"],
-                "icon": period["icon"],
-                "shortForecast": period["shortForecast"],
-                "isDaytime": period["isDaytime"],
-            }
-            for period in periods
-        ]
-
-
-async def get_current_conditions(stations_url: str) -> Optional[dict]:
+    hourly_forecast_cache[url] = forecast
+    return forecast
+
+
+async def get_current_conditions(
+    client: httpx.AsyncClient, stations_url: str
+) -> Optional[dict]:
     """Get current conditions from nearest observation station."""
+    cached = current_conditions_cache.get(stations_url, CACHE_MISS)
+
+    if cached is not CACHE_MISS:
+        logger.debug("Using cached current conditions for: %s", stations_url)
+        return cached
+
     try:
-        print("[Weather] Fetching observation stations")
-
-        async with httpx.AsyncClient() as client:
-            stations_response = await client.get(
-                stations_url,
-                headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                timeout=10.0,
-            )
-            stations_response.raise_for_status()
-            stations = stations_response.json()["features"]
-
-            if not stations:
-                print("[Weather] No observation stations found")
-                return None
-
-            station_id = stations[0]["id"]
-            print(f"[Weather] Fetching latest observation from: {station_id}")
-
-            obs_response = await client.get(
-                f"{station_id}/observations/latest",
-                headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                timeout=10.0,
-            )
-            obs_response.raise_for_status()
-            props = obs_response.json()["properties"]
-
-            temp_c = props.get("temperature", {}).get("value")
-            temp_f = celsius_to_fahrenheit(temp_c)
-
-            return {
-                "timestamp": props.get("timestamp"),
-                "temperature": temp_f,
-                "temperatureUnit": "F",
-                "description": props.get("textDescription") or "N/A",
-                "icon": props.get("icon") or "",
-                "humidity": props.get("relativeHumidity", {}).get("value"),
-                "windSpeed": props.get("windSpeed", {}).get("value"),
-                "windDirection": props.get("windDirection", {}).get("value"),
-                "pressure": props.get("barometricPressure", {}).get("value"),
-            }
+        return await single_flight(
+            current_conditions_inflight,
+            stations_url,
+            lambda: fetch_current_conditions(client, stations_url),
+        )
 
     except Exception as e:
-        print(f"[Weather] Error fetching current conditions: {e}")
+        logger.warning("Error fetching current conditions: %s", e)
         return None
 
 
+async def fetch_current_conditions(
+    client: httpx.AsyncClient, stations_url: str
+) -> Optional[dict]:
+    """Fetch the latest observation from NWS and cache it."""
+    logger.debug("Fetching observation stations")
+
+    stations = (await fetch_json(client, stations_url, stations_decoder)).features
+
+    if not stations:
+        logger.info("No observation stations found")
+        current_conditions_cache[stations_url] = None
+        return None
+
+    station_id = stations[0].id
+    logger.debug("Fetching latest observation from: %s", station_id)
+
+    observation_url = f"{station_id}/observations/latest"
+    observation = await fetch_json(client, observation_url, observation_decoder)
+    props = observation.properties
+
+    temp_c = (props.temperature or MISSING_VALUE).value
+    temp_f = celsius_to_fahrenheit(temp_c)
+
+    conditions = {
+        "timestamp": props.timestamp,
+        "temperature": temp_f,
+        "temperatureUnit": "F",
+        "description": props.text_description or "N/A",
+        "icon": props.icon or "",
+        "humidity": (props.relative_humidity or MISSING_VALUE).value,
+        "windSpeed": (props.wind_speed or MISSING_VALUE).value,
+        "windDirection": (props.wind_direction or MISSING_VALUE).value,
+        "pressure": (props.barometric_pressure or MISSING_VALUE).value,
+    }
+
+    current_conditions_cache[stations_url] = conditions
+    return conditions
+
+
 @router.get("/forecast")
 async def get_forecast(
+    request: Request,
+    response: Response,
     lat: float = Query(..., ge=-90, le=90, description="Latitude"),
     lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    client: httpx.AsyncClient = Depends(get_http_client),
 ):
     """
     Get current conditions and hourly forecast for a location.
 
     Uses the National Weather Service API (api.weather.gov).
-    Only works for US locations.
+    Only works for US locations. Responses carry an ETag computed from
+    the weather data (excluding the "updated" timestamp); a matching
+    If-None-Match returns 304 Not Modified with no body.
     """
     try:
-        print(f"[Weather] Getting weather for: lat={lat}, lon={lon}")
+        logger.debug("Getting weather for: lat=%s, lon=%s", lat, lon)
 
         # Get grid point information
-        grid_point = await get_grid_point(lat, lon)
+        grid_point = await get_grid_point(client, lat, lon)
 
-        # Fetch hourly forecast and current conditions
-        hourly_forecast = await get_hourly_forecast(grid_point["forecastHourly"])
-        current_conditions = await get_current_conditions(
-            grid_point["observationStations"]
+        # Fetch hourly forecast and current conditions concurrently.
+        # get_current_conditions degrades to None on its own errors.
+        hourly_forecast, current_conditions = await asyncio.gather(
+            get_hourly_forecast(client, grid_point.forecast_hourly),
+            get_current_conditions(client, grid_point.observation_stations),
         )
 
-        return {
+        body = {
             "location": {
-                "city": grid_point["city"],
-                "state": grid_point["state"],
-                "gridId": grid_point["gridId"],
-                "gridX": grid_point["gridX"],
-                "gridY": grid_point["gridY"],
+                "city": grid_point.city,
+                "state": grid_point.state,
+                "gridId": grid_point.grid_id,
+                "gridX": grid_point.grid_x,
+                "gridY": grid_point.grid_y,
             },
             "currentConditions": current_conditions,
             "hourlyForecast": hourly_forecast,
-            "updated": datetime.utcnow().isoformat() + "Z",
         }
 
+        etag = forecast_etag(body)
+        cache_headers = {"ETag": etag, "Cache-Control": FORECAST_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
+
+        response.headers.update(cache_headers)
+        body["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return body
+
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=e.response.status_code,